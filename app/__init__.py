@@ -1,3 +1,3 @@
-"""Web Read Advanced - Multi-threaded web crawler with JSONPath extraction."""
+"""Web Read Advanced - Asynchronous web crawler with JSONPath extraction."""
 
 __version__ = "1.0.3"
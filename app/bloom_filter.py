@@ -0,0 +1,92 @@
+"""Scalable Bloom filter for memory-efficient URL deduplication."""
+
+import math
+import hashlib
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter backed by a bit array."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        Initialize the Bloom filter.
+
+        Args:
+            capacity: Number of items the filter is sized for
+            error_rate: Target false positive rate at full capacity
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        """
+        Compute bit positions for an item using double hashing.
+
+        Args:
+            item: Item to hash
+
+        Returns:
+            Generator of bit positions
+        """
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        num_bits = self.num_bits
+        return ((h1 + i * h2) % num_bits for i in range(self.num_hashes))
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def add(self, item: str):
+        """
+        Add an item to the filter.
+
+        Args:
+            item: Item to add
+        """
+        bits = self.bits
+        for pos in self._positions(item):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+
+class ScalableBloomFilter:
+    """Bloom filter that grows by adding larger filters as it fills up."""
+
+    def __init__(self, initial_capacity: int = 1_000_000, error_rate: float = 0.001):
+        """
+        Initialize the scalable Bloom filter.
+
+        Each additional filter doubles the capacity and halves the error
+        rate, so the overall false positive rate stays below error_rate.
+
+        Args:
+            initial_capacity: Capacity of the first underlying filter
+            error_rate: Target overall false positive rate
+        """
+        self.error_rate = error_rate
+        self.filters = [BloomFilter(initial_capacity, error_rate / 2)]
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in f for f in reversed(self.filters))
+
+    def add(self, item: str):
+        """
+        Add an item, growing the filter if the current one is full.
+
+        Args:
+            item: Item to add
+        """
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(current.capacity * 2, current.error_rate / 2)
+            self.filters.append(current)
+        current.add(item)
+
+    def __len__(self) -> int:
+        return sum(f.count for f in self.filters)
@@ -1,20 +1,38 @@
-"""Multi-threaded web crawler with JSONPath-based result extraction."""
+"""Asynchronous web crawler with JSONPath-based result extraction."""
 
 import sys
-import time
-import threading
-from queue import Queue, Empty
-from typing import List, Set, Optional
+import random
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
 
-import requests
+import httpx
 from steputil import StepArgs
 
+import json_codec
+from bloom_filter import ScalableBloomFilter
 from rate_limiter import RateLimiter
+from result_writer import ResultWriter
 from template_resolver import TemplateResolver
 
 
+# Status codes worth retrying before counting a URL as failed
+RETRY_STATUSES = (429, 502, 503, 504)
+MAX_RETRIES = 5
+
+# Longest we wait before a retry, whatever Retry-After asks for
+MAX_RETRY_DELAY = 60
+
+# Upper bound in seconds for a whole request, including reading the body
+REQUEST_TIMEOUT = 30
+
+# Number of input records read before the loader yields to the event loop
+INPUT_YIELD_INTERVAL = 1000
+
+
 class WebCrawler:
-    """Multi-threaded web crawler with JSONPath-based result extraction."""
+    """Asynchronous web crawler with JSONPath-based result extraction."""
 
     def __init__(self, step: StepArgs, headers: dict):
         """
@@ -35,135 +53,321 @@ class WebCrawler:
         self.queue_threshold = step.config.queueThreshold if step.config.queueThreshold else 100
         self.remove_duplicates = step.config.removeDuplicates if step.config.removeDuplicates else False
 
-        # State
-        self.url_queue = Queue()
-        self.seen_urls: Optional[Set[str]] = set() if self.remove_duplicates else None
-        self.results = []
-        self.results_lock = threading.Lock()
+        # Templates are compiled once and reused for every response
+        self.result_resolver = TemplateResolver(self.result_template)
+        self.continue_resolver = TemplateResolver(self.continue_template) if self.continue_template else None
+
+        # State. Everything below is only touched from the event loop,
+        # so no locks are needed.
+        self.url_queue = asyncio.Queue()
+        self.queue_has_room = asyncio.Event()
+        self.input_done = asyncio.Event()
+        self.retry_tasks = set()
+        self.seen_urls: Optional[ScalableBloomFilter] = ScalableBloomFilter() if self.remove_duplicates else None
+        self.add_url = self._add_url_dedup if self.remove_duplicates else self._add_url_plain
+        self.writer = ResultWriter(step.output)
         self.rate_limiter = RateLimiter(self.rate_limit)
-        self.stop_event = threading.Event()
+
+        # HTTP client, created on the event loop in crawl()
+        self.session: Optional[httpx.AsyncClient] = None
 
         # Statistics
         self.processed_count = 0
         self.error_count = 0
-        self.stats_lock = threading.Lock()
+        self.result_count = 0
 
-    def add_url(self, url: str):
+    def _add_url_plain(self, url: str) -> bool:
         """
-        Add a URL to the queue, respecting duplicate checking.
+        Add a URL to the queue. Used as add_url when duplicates are allowed.
 
         Args:
             url: URL to add to the processing queue
+
+        Returns:
+            True if the URL was queued
         """
         if not url:
-            return
+            return False
+        self.url_queue.put_nowait((url, 0))
+        return True
 
-        if self.remove_duplicates:
-            if url in self.seen_urls:
-                return
-            self.seen_urls.add(url)
+    def _add_url_dedup(self, url: str):
+        """
+        Add a URL to the queue unless it was seen before. Used as add_url
+        when removeDuplicates is enabled.
+
+        Args:
+            url: URL to add to the processing queue
+
+        Returns:
+            True if the URL was queued
+        """
+        if not url or url in self.seen_urls:
+            return False
+        self.seen_urls.add(url)
+        self.url_queue.put_nowait((url, 0))
+        return True
+
+    @staticmethod
+    def _retry_delay(retry_after: Optional[str], attempt: int) -> float:
+        """
+        Compute how long to wait before retrying a URL.
 
-        self.url_queue.put(url)
+        Args:
+            retry_after: Value of the Retry-After response header, if any
+            attempt: Number of earlier attempts for this URL
 
-    def process_url(self, url: str):
+        Returns:
+            Delay in seconds, at most MAX_RETRY_DELAY. Uses Retry-After
+            when the server sent one, otherwise exponential backoff with
+            jitter.
+        """
+        delay = None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    pass
+        if delay is None:
+            delay = 0.25 * 2 ** attempt * random.uniform(0.5, 1.5)
+        return min(max(0.0, delay), MAX_RETRY_DELAY)
+
+    async def _fetch(self, url: str):
+        """
+        Fetch a URL and parse its JSON body.
+
+        httpx only limits individual connect/read/write operations, so the
+        request as a whole is capped at REQUEST_TIMEOUT seconds here.
+
+        Args:
+            url: URL to fetch
+
+        Returns:
+            Tuple of (status code, parsed JSON or None if status is not 200,
+            Retry-After header value or None)
+
+        Raises:
+            TimeoutError: If the request takes longer than REQUEST_TIMEOUT
+        """
+        async with asyncio.timeout(REQUEST_TIMEOUT):
+            response = await self.session.get(url)
+        if response.status_code == 200:
+            return response.status_code, json_codec.loads(response.content), None
+        return response.status_code, None, response.headers.get('Retry-After')
+
+    async def _retry_later(self, url: str, attempt: int, delay: float):
+        """
+        Put a URL back on the queue after a delay.
+
+        The queue item of the failed attempt is only marked done once the
+        retry is queued, so url_queue.join() keeps waiting for it.
+
+        Args:
+            url: URL to retry
+            attempt: Attempt number of the retry
+            delay: Seconds to wait before queueing it
+        """
+        try:
+            await asyncio.sleep(delay)
+            self.url_queue.put_nowait((url, attempt))
+        finally:
+            self.url_queue.task_done()
+
+    async def process_url(self, url: str, attempt: int = 0) -> Optional[float]:
         """
         Process a single URL - fetch, extract results and continue URLs.
 
         Args:
             url: URL to process
+            attempt: Number of earlier attempts for this URL
+
+        Returns:
+            Seconds after which the URL should be retried after a transient
+            failure, or None if it is done
         """
         try:
             # Respect rate limit
-            self.rate_limiter.acquire()
-
-            # Fetch URL
-            response = requests.get(url, headers=self.headers)
-
-            if response.status_code != 200:
-                print(f"Error fetching {url}: {response.status_code}", file=sys.stderr)
-                with self.stats_lock:
-                    self.error_count += 1
-                return
+            await self.rate_limiter.acquire()
 
-            # Parse JSON response
+            # Fetch URL and parse JSON response
             try:
-                data = response.json()
-            except Exception as e:
+                status, data, retry_after = await self._fetch(url)
+            except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError, TimeoutError) as e:
+                if attempt < MAX_RETRIES:
+                    return self._retry_delay(None, attempt)
+                print(f"Error fetching {url}: {type(e).__name__} {e}", file=sys.stderr)
+                self.error_count += 1
+                return
+            except ValueError as e:
                 print(f"Error parsing JSON from {url}: {e}", file=sys.stderr)
-                with self.stats_lock:
-                    self.error_count += 1
+                self.error_count += 1
+                return
+
+            if status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                return self._retry_delay(retry_after, attempt)
+
+            if status != 200:
+                print(f"Error fetching {url}: {status}", file=sys.stderr)
+                self.error_count += 1
                 return
 
             # Extract results
-            result_lines = TemplateResolver.resolve(self.result_template, data)
+            result_lines = self.result_resolver.resolve(data)
             if result_lines:
-                with self.results_lock:
-                    self.results.extend(result_lines)
+                await self.writer.write(result_lines)
+                self.result_count += len(result_lines)
 
             # Extract continue URLs
-            if self.continue_template:
-                continue_urls = TemplateResolver.resolve(self.continue_template, data)
+            if self.continue_resolver:
+                continue_urls = self.continue_resolver.resolve(data)
                 for continue_url in continue_urls:
                     self.add_url(continue_url)
 
-            with self.stats_lock:
-                self.processed_count += 1
+            self.processed_count += 1
 
         except Exception as e:
             print(f"Error processing URL {url}: {e}", file=sys.stderr)
-            with self.stats_lock:
-                self.error_count += 1
+            self.error_count += 1
 
-    def worker(self):
-        """Worker thread that processes URLs from the queue."""
-        while not self.stop_event.is_set():
-            try:
-                url = self.url_queue.get(timeout=1)
-                self.process_url(url)
+    async def worker(self):
+        """Worker coroutine that processes URLs from the queue until it receives None."""
+        while True:
+            item = await self.url_queue.get()
+            if item is None:
                 self.url_queue.task_done()
-            except Empty:
-                continue
+                return
+
+            if self.url_queue.qsize() < self.queue_threshold:
+                self.queue_has_room.set()
+
+            url, attempt = item
+            try:
+                retry_delay = await self.process_url(url, attempt)
             except Exception as e:
                 print(f"Worker error: {e}", file=sys.stderr)
+                retry_delay = None
+
+            if retry_delay is None:
+                self.url_queue.task_done()
+            else:
+                task = asyncio.create_task(self._retry_later(url, attempt + 1, retry_delay))
+                self.retry_tasks.add(task)
+                task.add_done_callback(self.retry_tasks.discard)
 
-    def load_input(self):
+    def _read_input_records(self):
+        """
+        Read records from the JSONL input file one line at a time.
+
+        Yields:
+            Parsed JSON object for each non-empty line
+        """
+        with open(self.step.input.path, "rb") as f:
+            for line_num, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json_codec.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"Invalid JSON on line {line_num}: {e}")
+
+    async def load_input(self):
         """
         Load URLs from input file, respecting queue threshold.
 
-        Reads the input file progressively, pausing when the queue
+        Streams the input file line by line, pausing when the queue
         reaches the configured threshold to prevent memory issues.
+        Workers wake the loader up again once the queue drains below
+        the threshold. The loader also yields to the event loop every
+        INPUT_YIELD_INTERVAL records, so records that queue nothing (e.g.
+        duplicates) cannot stall in-flight requests. Sets input_done when
+        finished, also on errors.
         """
-        if not self.step.input:
+        if not self.step.input or self.step.input.path is None:
+            self.input_done.set()
             return
 
         try:
-            records = self.step.input.readJsons()
-            print(f"Loading {len(records)} URLs from input file...")
+            print(f"Loading URLs from input file...")
+            loaded = 0
+
+            for record_num, record in enumerate(self._read_input_records(), 1):
+                if record_num % INPUT_YIELD_INTERVAL == 0:
+                    await asyncio.sleep(0)
 
-            for record in records:
                 # Wait if queue is too large
                 while self.url_queue.qsize() >= self.queue_threshold:
-                    if self.stop_event.is_set():
-                        return
-                    time.sleep(0.5)
+                    self.queue_has_room.clear()
+                    await self.queue_has_room.wait()
 
-                url = record.get('url')
-                if url:
-                    self.add_url(url)
+                if self.add_url(record.get('url')):
+                    loaded += 1
 
-            print(f"Finished loading input URLs")
+            print(f"Finished loading input file, queued {loaded} URLs")
         except Exception as e:
             print(f"Error loading input: {e}", file=sys.stderr)
+        finally:
+            self.input_done.set()
+
+    async def close(self):
+        """Release pooled HTTP connections."""
+        if self.session:
+            await self.session.aclose()
+
+    async def _crawl(self):
+        """Run the crawl on the current event loop."""
+        # Ask for compressed responses unless the config sets its own
+        # Accept-Encoding; httpx decompresses them transparently
+        headers = httpx.Headers({'Accept-Encoding': 'gzip, br'})
+        headers.update(self.headers)
+
+        # HTTP/2 multiplexes concurrent requests to the same host over a
+        # single connection; plain HTTP/1.1 servers still work as before
+        self.session = httpx.AsyncClient(
+            http2=True,
+            headers=headers,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=3.05)
+        )
+
+        # Start input loading alongside the workers
+        input_task = asyncio.create_task(self.load_input())
+        workers = [asyncio.create_task(self.worker()) for _ in range(self.concurrency)]
 
-    def crawl(self) -> List[str]:
+        try:
+            # Once all input is queued, the queue can only grow from URLs
+            # found by workers, which are queued before the task that
+            # found them is marked done. A single join is therefore enough.
+            await self.input_done.wait()
+            await self.url_queue.join()
+
+            # Stop workers
+            for _ in workers:
+                self.url_queue.put_nowait(None)
+            await asyncio.gather(*workers)
+        finally:
+            # Cancel whatever is still running, e.g. after an interrupt
+            tasks = [input_task, *workers, *self.retry_tasks]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.close()
+
+    def crawl(self) -> int:
         """
         Main crawling process.
 
-        Starts worker threads, loads input, and processes URLs until
-        the queue is empty.
+        Starts worker coroutines, loads input, and processes URLs until
+        the queue is empty. Results are streamed to the output file as
+        they are extracted.
 
         Returns:
-            List of extracted result strings
+            Number of results written
         """
         # Initialize queue with seed URLs
         seed_urls = self.step.config.seedUrls if self.step.config.seedUrls else []
@@ -172,33 +376,14 @@ class WebCrawler:
         for url in seed_urls:
             self.add_url(url)
 
-        # Start input loading in separate thread
-        input_thread = threading.Thread(target=self.load_input, daemon=True)
-        input_thread.start()
-
-        # Start worker threads
-        workers = []
-        for i in range(self.concurrency):
-            worker = threading.Thread(target=self.worker, daemon=True)
-            worker.start()
-            workers.append(worker)
-
-        # Wait for queue to be empty
+        self.writer.start()
         try:
-            while True:
-                self.url_queue.join()
-                # Double check after a short delay
-                time.sleep(1)
-                if self.url_queue.empty():
-                    break
+            asyncio.run(self._crawl())
         except KeyboardInterrupt:
             print("Crawl interrupted by user", file=sys.stderr)
+        finally:
+            self.writer.close()
 
-        # Stop workers
-        self.stop_event.set()
-        for worker in workers:
-            worker.join(timeout=5)
-
-        print(f"Crawl complete: processed {self.processed_count} URLs, {self.error_count} errors, {len(self.results)} results")
+        print(f"Crawl complete: processed {self.processed_count} URLs, {self.error_count} errors, {self.result_count} results")
 
-        return self.results
+        return self.result_count
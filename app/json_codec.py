@@ -0,0 +1,39 @@
+"""Fast JSON parsing with orjson and a lossless stdlib fallback."""
+
+import re
+import json
+from typing import Any, Union
+
+import orjson
+
+
+# orjson turns integers outside the 64-bit range into floats. Those need
+# at least 19 digits, so documents with such digit runs go through the
+# stdlib parser, which keeps integers exact.
+LONG_DIGITS_PATTERN = re.compile(rb'\d{19}')
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Parse a JSON document without losing information.
+
+    Uses orjson, falling back to the stdlib json module for documents
+    that may contain integers beyond 64 bits or that orjson rejects,
+    such as NaN or Infinity.
+
+    Args:
+        data: JSON document as bytes or str
+
+    Returns:
+        Parsed JSON value
+
+    Raises:
+        json.JSONDecodeError: If the document is not valid JSON
+    """
+    raw = data.encode('utf-8') if isinstance(data, str) else data
+    if not LONG_DIGITS_PATTERN.search(raw):
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
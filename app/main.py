@@ -2,7 +2,6 @@
 
 import sys
 import os
-import json
 from steputil import StepArgs, StepArgsBuilder
 
 # Import modules from same directory
@@ -32,22 +31,10 @@ def main(step: StepArgs):
         print(f"Added Bearer token to request headers")
 
     # Create crawler and run
+    # Results are streamed to the output file while crawling
     crawler = WebCrawler(step, headers)
-    results = crawler.crawl()
-
-    # Write results as JSONL (each result line as a JSON string)
-    output_records = []
-    for result_line in results:
-        # Try to parse as JSON, otherwise store as string
-        try:
-            result_obj = json.loads(result_line)
-            output_records.append(result_obj)
-        except:
-            # If not valid JSON, wrap in object
-            output_records.append({"result": result_line})
-
-    step.output.writeJsons(output_records)
-    print(f"Written {len(output_records)} results to output")
+    result_count = crawler.crawl()
+    print(f"Written {result_count} results to output")
 
 
 def validate_config(config):
@@ -1,39 +1,60 @@
-"""Rate limiter for controlling request rates across multiple threads."""
+"""Rate limiter for controlling request rates across concurrent workers."""
 
 import time
-import threading
+import asyncio
 
 
 class RateLimiter:
-    """Thread-safe rate limiter for controlling request rate across multiple threads."""
+    """Token bucket rate limiter shared by the crawler's worker coroutines."""
 
     def __init__(self, requests_per_second: float):
         """
         Initialize the rate limiter.
 
+        The bucket holds up to one second worth of tokens, so short bursts
+        after a quiet period are allowed without waiting.
+
         Args:
             requests_per_second: Maximum number of requests allowed per second.
                                 Set to 0 or negative for no rate limiting.
         """
-        self.requests_per_second = requests_per_second
-        self.min_interval = 1.0 / requests_per_second if requests_per_second > 0 else 0
-        self.last_request_time = 0
-        self.lock = threading.Lock()
+        self.rate = requests_per_second
+        self.capacity = max(1, requests_per_second)
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+
+    def reserve(self) -> float:
+        """
+        Take a token from the bucket.
 
-    def acquire(self):
+        Returns:
+            Number of seconds the caller has to wait before its token
+            becomes available (0.0 if one was available immediately).
+        """
+        # No await in here, so this runs atomically on the event loop
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+
+        # Reserve the next token; later callers queue up behind it
+        deficit = (1 - self.tokens) / self.rate
+        self.tokens = 0
+        self.last += deficit
+        return deficit
+
+    async def acquire(self):
         """
         Wait if necessary to respect rate limit.
 
-        This method blocks until it's safe to make another request
-        without exceeding the configured rate limit.
+        The token is reserved up front and only the caller itself sleeps
+        for its deficit, so other workers are not serialized behind it.
         """
-        if self.requests_per_second <= 0:
+        if self.rate <= 0:
             return
 
-        with self.lock:
-            now = time.time()
-            time_since_last = now - self.last_request_time
-            if time_since_last < self.min_interval:
-                sleep_time = self.min_interval - time_since_last
-                time.sleep(sleep_time)
-            self.last_request_time = time.time()
+        deficit = self.reserve()
+        if deficit > 0:
+            await asyncio.sleep(deficit)
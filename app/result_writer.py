@@ -0,0 +1,128 @@
+"""Background JSONL writer for streaming crawl results to the output file."""
+
+import json
+import asyncio
+import threading
+from pathlib import Path
+from queue import Queue, Full
+from typing import List, Optional
+
+import orjson
+from steputil import OutputField
+
+import json_codec
+
+
+class ResultWriter:
+    """Writes result lines to a JSONL file from a dedicated thread."""
+
+    def __init__(self, output: OutputField, batch_size: int = 1000, max_pending: int = 100):
+        """
+        Initialize the result writer.
+
+        Args:
+            output: Output field to write the JSONL file to
+            batch_size: Number of lines collected before handing them to
+                        the writer thread
+            max_pending: Maximum number of queued batches before handing
+                         over further batches has to wait
+        """
+        self.path = output.path if output else None
+        self.batch_size = batch_size
+        self.pending: List[str] = []
+        self.queue = Queue(maxsize=max_pending)
+        self.thread: Optional[threading.Thread] = None
+        self.error: Optional[Exception] = None
+
+    @staticmethod
+    def to_jsonl(result_line: str) -> bytes:
+        """
+        Convert a result line to a UTF-8 encoded JSONL line.
+
+        Result lines that are valid JSON are written as they are, anything
+        else is wrapped in an object under the "result" key.
+
+        Args:
+            result_line: Resolved result template
+
+        Returns:
+            Single JSONL line including the trailing newline
+        """
+        try:
+            result_obj = json_codec.loads(result_line)
+        except ValueError:
+            return orjson.dumps({"result": result_line}) + b"\n"
+
+        if "\n" in result_line or "\r" in result_line:
+            # Keep one record per line, also for readers using universal
+            # newlines; stdlib json keeps big integers and NaN as they are
+            return json.dumps(result_obj, ensure_ascii=False).encode("utf-8") + b"\n"
+        return result_line.encode("utf-8") + b"\n"
+
+    def start(self):
+        """Start the writer thread."""
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    async def write(self, result_lines: List[str]):
+        """
+        Queue result lines for writing.
+
+        Lines are collected in a local batch that is only handed over to
+        the writer thread once it is full, so the producer does not touch
+        the shared queue for every response. Must always be called from
+        the same event loop. While the writer thread is too far behind,
+        the handover waits in an executor thread so the event loop keeps
+        running.
+
+        Args:
+            result_lines: Result lines to write
+        """
+        self.pending.extend(result_lines)
+        if len(self.pending) >= self.batch_size:
+            batch, self.pending = self.pending, []
+            try:
+                self.queue.put_nowait(batch)
+            except Full:
+                await asyncio.get_running_loop().run_in_executor(None, self.queue.put, batch)
+
+    def close(self):
+        """
+        Write all queued results and wait for the writer thread to finish.
+
+        Raises:
+            Exception: Any error the writer thread ran into
+        """
+        if self.thread:
+            if self.pending:
+                self.queue.put(self.pending)
+                self.pending = []
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.error:
+            raise self.error
+
+    def _run(self):
+        """Writer thread main loop."""
+        try:
+            if self.path is None:
+                # Optional output not provided, just drain the queue
+                while self.queue.get() is not None:
+                    pass
+                return
+
+            output_path = Path(self.path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(output_path, "wb") as f:
+                while True:
+                    batch = self.queue.get()
+                    if batch is None:
+                        break
+                    f.write(b"".join([self.to_jsonl(line) for line in batch]))
+        except Exception as e:
+            self.error = e
+            # Keep draining so producers never block on a dead writer
+            while self.queue.get() is not None:
+                pass
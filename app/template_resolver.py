@@ -2,24 +2,184 @@
 
 import sys
 import re
+from functools import lru_cache
+from itertools import product
 from typing import List
 from jsonpath_ng import parse
 
 
+EXPRESSION_PATTERN = re.compile(r'\$\{([^}]+)\}')
+
+
+# Paths made only of plain field names, [N] indexes and [*] wildcards,
+# optionally rooted at $, are evaluated without jsonpath_ng
+SIMPLE_PATH_PATTERN = re.compile(
+    r'^(?:\$\.(?=[A-Za-z_])|\$(?=\[))?(?:[A-Za-z_][A-Za-z0-9_]*|\[(?:\*|\d+)\])(?:\.[A-Za-z_][A-Za-z0-9_]*|\[(?:\*|\d+)\])*$'
+)
+SIMPLE_STEP_PATTERN = re.compile(r'\.?([A-Za-z_][A-Za-z0-9_]*)|\[(\*|\d+)\]')
+
+# Names the jsonpath_ng lexer treats as keywords
+RESERVED_WORDS = {'where'}
+
+
+def _field_step(name: str):
+    """Build a step selecting a field from each dict."""
+    def step(values):
+        return [value[name] for value in values if isinstance(value, dict) and name in value]
+    return step
+
+
+def _index_step(index: int):
+    """Build a step selecting an index from each list."""
+    def step(values):
+        return [value[index] for value in values if value and len(value) > index]
+    return step
+
+
+def _wildcard_step(values):
+    """Select all elements of each list."""
+    result = []
+    for value in values:
+        if not value:
+            continue
+        # Same as jsonpath_ng: [*] on a dict or scalar matches the value itself
+        if isinstance(value, (dict, int, str)):
+            result.append(value)
+        else:
+            result.extend(value)
+    return result
+
+
+def _compile_simple(expr: str):
+    """
+    Compile a simple JSONPath expression into a direct traversal.
+
+    Args:
+        expr: JSONPath expression
+
+    Returns:
+        Callable returning the list of matched values, or None if the
+        expression uses syntax beyond the simple subset
+    """
+    if not SIMPLE_PATH_PATTERN.match(expr):
+        return None
+
+    steps = []
+    for name, index in SIMPLE_STEP_PATTERN.findall(expr.lstrip('$')):
+        if name in RESERVED_WORDS:
+            return None
+        if name:
+            steps.append(_field_step(name))
+        elif index == '*':
+            steps.append(_wildcard_step)
+        else:
+            steps.append(_index_step(int(index)))
+
+    def evaluate(json_data):
+        values = [json_data]
+        for step in steps:
+            values = step(values)
+            if not values:
+                break
+        return values
+
+    return evaluate
+
+
+@lru_cache(maxsize=256)
+def _compile(expr: str):
+    """
+    Compile a JSONPath expression into an evaluation function, caching the result.
+
+    Simple paths are compiled into a direct traversal; everything else
+    is parsed with jsonpath_ng.
+
+    Args:
+        expr: JSONPath expression
+
+    Returns:
+        Callable taking JSON data and returning the list of matched values
+    """
+    evaluate = _compile_simple(expr)
+    if evaluate:
+        return evaluate
+
+    jsonpath = parse(expr)
+    return lambda json_data: [match.value for match in jsonpath.find(json_data)]
+
+
 class TemplateResolver:
     """Resolves template strings containing JSONPath expressions."""
 
-    @staticmethod
-    def resolve(template: str, json_data: dict) -> List[str]:
+    def __init__(self, template: str):
         """
-        Resolve a template string with JSONPath expressions.
+        Compile a template string.
 
-        Template strings can contain ${...} expressions where the content
-        is a JSONPath expression. These are evaluated against the json_data
-        and replaced with the matched values.
+        The ${...} expressions are extracted and compiled once, so resolving
+        the template against many responses only evaluates them.
 
         Args:
             template: Template string containing ${jsonpath} expressions
+        """
+        self.template = template
+        self.valid = True
+        self.exprs = []
+
+        # Split into literal segments around the placeholders; the capture
+        # group interleaves the expressions: [lit, expr, lit, expr, lit]
+        parts = EXPRESSION_PATTERN.split(template or '')
+        self.segments = parts[0::2]
+
+        # Each distinct expression is evaluated once and fills every
+        # placeholder that uses it
+        slots = {}
+        self.slot_index = []
+        for jsonpath_expr in parts[1::2]:
+            if jsonpath_expr not in slots:
+                slots[jsonpath_expr] = len(slots)
+                try:
+                    self.exprs.append((jsonpath_expr, _compile(jsonpath_expr)))
+                except Exception as e:
+                    print(f"Error parsing JSONPath '{jsonpath_expr}': {e}", file=sys.stderr)
+                    self.valid = False
+            self.slot_index.append(slots[jsonpath_expr])
+
+        # (slot, following literal) pairs for the join in resolve()
+        self.tail = list(zip(self.slot_index, self.segments[1:]))
+
+        # Specialize resolve() for the common template shapes
+        if not self.template or not self.valid:
+            self.resolve = self._resolve_nothing
+        elif not self.exprs:
+            self.resolve = self._resolve_literal
+        elif self.segments == ['', '']:
+            self.resolve = self._resolve_single
+
+    def _resolve_nothing(self, json_data: dict) -> List[str]:
+        """Resolve an empty or invalid template."""
+        return []
+
+    def _resolve_literal(self, json_data: dict) -> List[str]:
+        """Resolve a template without any ${...} expressions."""
+        return [self.template]
+
+    def _resolve_single(self, json_data: dict) -> List[str]:
+        """Resolve a template that consists of a single ${...} expression."""
+        jsonpath_expr, evaluate = self.exprs[0]
+        try:
+            return [str(value) for value in evaluate(json_data)]
+        except Exception as e:
+            print(f"Error evaluating JSONPath '{jsonpath_expr}': {e}", file=sys.stderr)
+            return []
+
+    def resolve(self, json_data: dict) -> List[str]:
+        """
+        Resolve the template against JSON data.
+
+        Each ${...} expression is evaluated against the json_data and one
+        result is produced for every combination of matched values.
+
+        Args:
             json_data: JSON data to evaluate JSONPath expressions against
 
         Returns:
@@ -27,41 +187,34 @@ class TemplateResolver:
             fails to match or if there's a parsing error.
 
         Example:
-            >>> template = '{"id": ${items[*].id}, "name": "${items[*].name}"}'
+            >>> resolver = TemplateResolver('{"id": ${items[*].id}, "name": "${items[*].name}"}')
             >>> data = {"items": [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}]}
-            >>> TemplateResolver.resolve(template, data)
-            ['{"id": 1, "name": "A"}', '{"id": 2, "name": "B"}']
+            >>> resolver.resolve(data)
+            ['{"id": 1, "name": "A"}', '{"id": 1, "name": "B"}', '{"id": 2, "name": "A"}', '{"id": 2, "name": "B"}']
         """
-        if not template:
-            return []
-
-        results = [template]
-
-        # Find all ${...} expressions
-        pattern = r'\$\{([^}]+)\}'
-        matches = re.findall(pattern, template)
-
-        for jsonpath_expr in matches:
+        values_per_slot = []
+        for jsonpath_expr, evaluate in self.exprs:
             try:
-                jsonpath = parse(jsonpath_expr)
-                matches_obj = jsonpath.find(json_data)
-
-                if not matches_obj:
-                    # No match found, return empty
-                    return []
-
-                # Get all matched values
-                values = [match.value for match in matches_obj]
-
-                # Expand results for each value
-                new_results = []
-                for result in results:
-                    for value in values:
-                        new_results.append(result.replace(f'${{{jsonpath_expr}}}', str(value)))
-                results = new_results
-
+                values = evaluate(json_data)
             except Exception as e:
-                print(f"Error parsing JSONPath '{jsonpath_expr}': {e}", file=sys.stderr)
+                print(f"Error evaluating JSONPath '{jsonpath_expr}': {e}", file=sys.stderr)
                 return []
 
+            if not values:
+                # No match found, return empty
+                return []
+
+            values_per_slot.append([str(value) for value in values])
+
+        # Build each combination of values in a single join over the segments
+        first_segment = self.segments[0]
+        tail = self.tail
+        results = []
+        for values in product(*values_per_slot):
+            parts = [first_segment]
+            for slot, segment in tail:
+                parts.append(values[slot])
+                parts.append(segment)
+            results.append(''.join(parts))
+
         return results